@@ -6,39 +6,148 @@ Headless camera application that saves photos and videos to SAMBA shared folder
 
 import os
 import sys
+import io
 import time
 import subprocess
 import threading
+import queue
 import signal
+import selectors
+import socket
+import mmap
 import termios
 import tty
 import shutil
 import getpass
+import collections
+import json
+import pwd
+import grp
 from datetime import datetime, timezone, timedelta
 
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None  # 未インストールの場合はポーリングで待つ
+
 # SAMBA共有フォルダ設定
 CURRENT_USER = getpass.getuser()  # 現在のユーザー名を取得
 SAMBA_SHARE_PATH = f'/home/{CURRENT_USER}/public'        # パブリックフォルダに変更
 SAMBA_CONFIG_FILE = '/etc/samba/smb.conf'                # SAMBA設定ファイル
 SHARE_NAME = 'camera_public'                              # 共有名をcamera_publicに変更
 
+# raspistillの対応オプションのキャッシュ（バイナリのinode/mtimeが同じ間は再確認しない）
+CAPS_CACHE_FILE = os.path.expanduser('~/.cache/camera_app/caps.json')
+
+# タイムスタンプ用のタイムゾーン（JST）
+_JST = timezone(timedelta(hours=9))
+
+# ディスク使用量キャッシュの有効期間（秒）
+DISK_USAGE_CACHE_TTL = 5.0
+
+# プロンプト再描画の最小間隔（秒）
+PROMPT_REDRAW_INTERVAL = 0.5
+
+# キー入力待ちのタイムアウト（秒、待機中に録画プロセスの状態を確認する間隔）
+KEY_WAIT_TIMEOUT = 1.0
+
+# SAMBA保存キューの最大長と終了時の待ち時間（秒）
+SAVE_QUEUE_SIZE = 8
+SAVE_WORKER_JOIN_TIMEOUT = 30
+
+# IPアドレスキャッシュの有効期間（秒）
+IP_ADDRESS_CACHE_TTL = 60.0
+
+# シグナルモード撮影の一時ファイル名と待ち時間（秒）
+CAPTURE_FILE_PREFIX = '.capture_'
+PHOTO_CAPTURE_TIMEOUT = 10
+
+# raspistill起動直後はSIGUSR1で終了/無視されるため、最初の撮影シグナルまで待つ時間（秒）
+PREVIEW_WARMUP = 0.5
+# 撮影が始まらない場合（初期化中でシグナルが無視された等）にSIGUSR1を再送する間隔（秒）
+CAPTURE_RETRIGGER_INTERVAL = 1.0
+
+# キー入力プロンプト（rawモード用のCRLFで事前にエンコード）
+_PROMPT_BYTES = (
+    "\r\n🎮 キー入力待ち:\r\n"
+    "  SPACE: 写真撮影 | v: 動画録画 | p: プレビュー切り替え\r\n"
+    "  s: ステータス | h: シェル | q/ESC: 終了\r\n"
+).encode('utf-8')
+
+# ステータス画面の見出し
+_STATUS_HEADER = "\n" + "="*50 + "\n📊 システムステータス\n" + "="*50
+
 class CameraApp:
+    # インスタンス辞書を持たせず、属性アクセスを高速化
+    __slots__ = (
+        'script_dir', 'photos_dir', 'videos_dir', '_share_subdirs',
+        '_inotify', '_photo_files', '_video_files',
+        'preview_process', '_preview_started', '_preview_ready', 'video_process', 'is_recording', '_current_video_path',
+        '_disk_usage', '_disk_usage_time', '_ip_address', '_ip_address_time',
+        '_network_prefixes',
+        '_raspistill_path', '_raspivid_path', 'supports_immediate', 'supports_quality', 'supports_resolution',
+        '_photo_cmd_base', '_nobody_uid', '_nogroup_gid', 'save_queue', 'save_thread',
+        'quiet_mode', 'original_terminal_settings', '_orig_stdout',
+        '_last_prompt', '_state_changed', '_signal_rsock', '_signal_wsock',
+    )
+    
     def __init__(self):
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
         os.chdir(self.script_dir)
         
-        # ディレクトリ作成
-        self.photos_dir = os.path.join(self.script_dir, 'photos')
-        self.videos_dir = os.path.join(self.script_dir, 'videos')
-        os.makedirs(self.photos_dir, exist_ok=True)
-        os.makedirs(self.videos_dir, exist_ok=True)
-        os.chmod(self.photos_dir, 0o755)
-        os.chmod(self.videos_dir, 0o755)
+        # ディレクトリ作成（カメラ出力はSAMBA共有フォルダに直接書き込む）
+        self.photos_dir = os.path.join(SAMBA_SHARE_PATH, 'photos')
+        self.videos_dir = os.path.join(SAMBA_SHARE_PATH, 'videos')
+        os.makedirs(self.photos_dir, mode=0o777, exist_ok=True)
+        os.makedirs(self.videos_dir, mode=0o777, exist_ok=True)
+        
+        # ネットワークパス表示用の共有内フォルダ名
+        self._share_subdirs = {
+            "Photo": os.path.basename(self.photos_dir),
+            "動画": os.path.basename(self.videos_dir),
+        }
+        
+        # 従来の場所（スクリプトディレクトリ）からのシンボリックリンク
+        self.link_legacy_dir('photos', self.photos_dir)
+        self.link_legacy_dir('videos', self.videos_dir)
+        
+        # 撮影ファイルの書き込み完了通知（raspistillは「名前~」からリネームする）
+        self._inotify = None
+        if inotify_simple is not None:
+            try:
+                self._inotify = inotify_simple.INotify()
+                self._inotify.add_watch(
+                    self.photos_dir,
+                    inotify_simple.flags.MOVED_TO | inotify_simple.flags.CLOSE_WRITE
+                )
+            except OSError:
+                self._inotify = None
+        
+        # 保存済みファイルの一覧（古い順、起動時に一度だけスキャン）
+        self._photo_files = self.scan_files(self.photos_dir, '.jpg')
+        self._video_files = self.scan_files(self.videos_dir, '.h264')
         
         # カメラプロセス
         self.preview_process = None
+        self._preview_started = 0.0
+        self._preview_ready = False
         self.video_process = None
         self.is_recording = False
+        self._current_video_path = None
+        
+        # ディスク使用量のキャッシュ
+        self._disk_usage = None
+        self._disk_usage_time = 0.0
+        
+        # IPアドレスのキャッシュ
+        self._ip_address = None
+        self._ip_address_time = 0.0
+        # ファイル種別ごとのネットワークパス接頭辞（IP更新時に作り直す）
+        self._network_prefixes = {}
+        
+        # カメラツールの絶対パス（posix_spawnで起動できるように事前に解決）
+        self._raspistill_path = shutil.which('raspistill') or 'raspistill'
+        self._raspivid_path = shutil.which('raspivid') or 'raspivid'
         
         # カメラツールの互換性チェック
         self.check_camera_compatibility()
@@ -46,33 +155,86 @@ class CameraApp:
         # SAMBA共有フォルダ設定
         self.setup_samba_share()
         
+        # 共有ファイルの所有者（nobody:nogroup）を一度だけ解決
+        try:
+            self._nobody_uid = pwd.getpwnam('nobody').pw_uid
+            self._nogroup_gid = grp.getgrnam('nogroup').gr_gid
+        except KeyError:
+            self._nobody_uid = -1
+            self._nogroup_gid = -1
+        
+        # SAMBA保存をバックグラウンドで行うワーカー
+        self.save_queue = queue.Queue(maxsize=SAVE_QUEUE_SIZE)
+        self.save_thread = threading.Thread(target=self._save_worker, daemon=True)
+        self.save_thread.start()
+        
         # 設定
         self.quiet_mode = False
         self.original_terminal_settings = None
+        self._orig_stdout = None
+        
+        # プロンプト再描画の間引き用
+        self._last_prompt = 0.0
+        self._state_changed = True
         
         # シグナルハンドラー設定
+        # シグナルはwakeup fd経由でメインループのselectに届け、終了処理はループ側で行う
+        self._signal_rsock, self._signal_wsock = socket.socketpair()
+        self._signal_rsock.setblocking(False)
+        self._signal_wsock.setblocking(False)
+        signal.set_wakeup_fd(self._signal_wsock.fileno())
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
         
         # 起動時のプロセスクリーンアップ
         self.cleanup_camera_processes()
         
+    def link_legacy_dir(self, name, target):
+        """スクリプトディレクトリ内の旧フォルダを共有フォルダへのシンボリックリンクにする"""
+        legacy_dir = os.path.join(self.script_dir, name)
+        if os.path.islink(legacy_dir):
+            return
+        try:
+            if os.path.isdir(legacy_dir):
+                # 以前の撮影データを共有フォルダへ移動してから置き換える
+                # （同名のファイルが共有フォルダにある場合は上書きせずに残す）
+                with os.scandir(legacy_dir) as it:
+                    entries = list(it)
+                moved = 0
+                for entry in entries:
+                    dest_path = os.path.join(target, entry.name)
+                    if not os.path.lexists(dest_path):
+                        shutil.move(entry.path, dest_path)
+                        moved += 1
+                if moved:
+                    print(f"📦 {name}/ の既存ファイル {moved}件を共有フォルダへ移動しました: {target}")
+                os.rmdir(legacy_dir)
+            os.symlink(target, legacy_dir)
+        except OSError as e:
+            print(f"⚠️  {legacy_dir} を共有フォルダへのリンクに置き換えられません: {e}")
+            print(f"   撮影データの保存先: {target}")
+
+    def scan_files(self, directory, extension):
+        """ディレクトリ内のファイル名を古い順に並べたdequeを返す"""
+        with os.scandir(directory) as entries:
+            names = [e.name for e in entries if e.name.endswith(extension) and not e.name.startswith('.')]
+        # ファイル名はタイムスタンプなので名前順 = 撮影順
+        names.sort()
+        return collections.deque(names)
+
     def setup_samba_share(self):
         """SAMBA共有フォルダの設定"""
         try:
-            # 共有フォルダの作成
-            os.makedirs(SAMBA_SHARE_PATH, exist_ok=True)
-            os.makedirs(os.path.join(SAMBA_SHARE_PATH, 'photos'), exist_ok=True)
-            os.makedirs(os.path.join(SAMBA_SHARE_PATH, 'videos'), exist_ok=True)
-            
-            # 権限を設定（誰でも読み書き可能）
-            os.chmod(SAMBA_SHARE_PATH, 0o777)
-            os.chmod(os.path.join(SAMBA_SHARE_PATH, 'photos'), 0o777)
-            os.chmod(os.path.join(SAMBA_SHARE_PATH, 'videos'), 0o777)
+            # 共有フォルダの作成と権限設定（誰でも読み書き可能）
+            # makedirs の mode は umask で削られるので、違う時だけ chmod する
+            for path in (SAMBA_SHARE_PATH, self.photos_dir, self.videos_dir):
+                os.makedirs(path, mode=0o777, exist_ok=True)
+                if os.stat(path).st_mode & 0o777 != 0o777:
+                    os.chmod(path, 0o777)
             
             print(f"📁 Creating SAMBA shared folder: {SAMBA_SHARE_PATH}")
-            print(f"   📸 Photos folder: {os.path.join(SAMBA_SHARE_PATH, 'photos')}")
-            print(f"   🎥 Videos folder: {os.path.join(SAMBA_SHARE_PATH, 'videos')}")
+            print(f"   📸 Photos folder: {self.photos_dir}")
+            print(f"   🎥 Videos folder: {self.videos_dir}")
             
             # Check SAMBA config file
             if os.path.exists(SAMBA_CONFIG_FILE):
@@ -89,12 +251,16 @@ class CameraApp:
     def check_samba_config(self):
         """Check SAMBA configuration"""
         try:
-            # Check SAMBA config file content
-            with open(SAMBA_CONFIG_FILE, 'r') as f:
-                config_content = f.read()
+            # Check if share configuration exists (search bytes without decoding the file)
+            share_marker = f'[{SHARE_NAME}]'.encode()
+            with open(SAMBA_CONFIG_FILE, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    found = False
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as config_content:
+                        found = config_content.find(share_marker) != -1
             
-            # Check if share configuration exists
-            if f'[{SHARE_NAME}]' in config_content:
+            if found:
                 print("✅ SAMBA share configuration confirmed")
                 print(f"   Share name: {SHARE_NAME}")
                 print(f"   Path: {SAMBA_SHARE_PATH}")
@@ -143,41 +309,38 @@ class CameraApp:
     def save_to_samba(self, file_path, file_type):
         """Save file to SAMBA shared folder"""
         try:
+            # The camera already wrote the file into the shared folder
             file_name = os.path.basename(file_path)
+            dest_path = file_path
             
-            # Determine destination based on file type
-            if file_type == "Photo":
-                dest_dir = os.path.join(SAMBA_SHARE_PATH, 'photos')
-                dest_path = os.path.join(dest_dir, file_name)
-            else:  # Video
-                dest_dir = os.path.join(SAMBA_SHARE_PATH, 'videos')
-                dest_path = os.path.join(dest_dir, file_name)
-            
-            # Copy file to shared folder
-            shutil.copy2(file_path, dest_path)
+            # Flush to the SD card and drop the pages from cache before the next capture
+            self.sync_and_evict(dest_path)
             
             # Set permissions (readable/writable by everyone)
             os.chmod(dest_path, 0o777)
             
             # Set file owner to guest user (nobody) for universal access
-            try:
-                import pwd
-                import grp
-                # Get nobody user and nogroup group
-                nobody_uid = pwd.getpwnam('nobody').pw_uid
-                nogroup_gid = grp.getgrnam('nogroup').gr_gid
-                os.chown(dest_path, nobody_uid, nogroup_gid)
-                print(f"   🔓 File owner: nobody:nogroup (Universal access)")
-            except Exception as chown_error:
-                print(f"⚠️  File owner setting error: {chown_error}")
-                print("   Creating file with current user")
-            
-            # Get file attributes
-            stat_info = os.stat(dest_path)
-            print(f"✅ {file_type} saved to SAMBA shared folder: {file_name}")
-            print(f"   Save location: {dest_path}")
-            print(f"   File permissions: {oct(stat_info.st_mode)[-3:]}")
-            print(f"   Network path: \\\\{self.get_ip_address()}\\{SHARE_NAME}\\{os.path.basename(dest_dir)}\\{file_name}")
+            owner_line = None
+            if self._nobody_uid == -1:
+                print("⚠️  File owner setting error: nobody:nogroup not found\n   Creating file with current user")
+            else:
+                try:
+                    os.chown(dest_path, self._nobody_uid, self._nogroup_gid)
+                    owner_line = "   🔓 File owner: nobody:nogroup (Universal access)"
+                except Exception as chown_error:
+                    print(f"⚠️  File owner setting error: {chown_error}\n   Creating file with current user")
+            
+            # Report in a single write (skipped entirely in quiet mode)
+            if not self.quiet_mode:
+                lines = [
+                    f"✅ {file_type} saved to SAMBA shared folder: {file_name}",
+                    f"   Save location: {dest_path}",
+                    "   File permissions: 777",
+                    f"   Network path: {self.get_network_prefix(file_type)}{file_name}",
+                ]
+                if owner_line:
+                    lines.insert(0, owner_line)
+                sys.stdout.write("\n".join(lines) + "\n")
             
             return True
             
@@ -185,33 +348,114 @@ class CameraApp:
             print(f"❌ {file_type} save error: {e}")
             return False
     
+    def sync_and_evict(self, file_path):
+        """ファイルをディスクに同期し、ページキャッシュから解放"""
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+    def _save_worker(self):
+        """キューからファイルを取り出してSAMBA共有フォルダに保存"""
+        while True:
+            item = self.save_queue.get()
+            if item is None:
+                break
+            self.save_to_samba(*item)
+            self.flush_output()
+
+    def queue_save(self, file_path, file_type):
+        """SAMBA保存をキューに追加（満杯の場合はその場で保存）"""
+        try:
+            self.save_queue.put_nowait((file_path, file_type))
+        except queue.Full:
+            print("⚠️  Save queue is full, saving synchronously")
+            self.save_to_samba(file_path, file_type)
+
+    def stop_save_worker(self):
+        """保存ワーカーを停止（キューに残ったファイルの保存を待つ）"""
+        try:
+            self.save_queue.put(None, timeout=SAVE_WORKER_JOIN_TIMEOUT)
+            self.save_thread.join(timeout=SAVE_WORKER_JOIN_TIMEOUT)
+        except queue.Full:
+            pass
+        if self.save_thread.is_alive():
+            print("⚠️  Save worker did not finish in time")
+
     def get_ip_address(self):
-        """IPアドレスを取得"""
+        """IPアドレスを取得（60秒間キャッシュ、取得失敗時は次回再取得）"""
+        now = time.monotonic()
+        if self._ip_address in (None, "unknown") or now - self._ip_address_time >= IP_ADDRESS_CACHE_TTL:
+            self._ip_address = self.lookup_ip_address()
+            self._ip_address_time = now
+            self._network_prefixes = {
+                file_type: f"\\\\{self._ip_address}\\{SHARE_NAME}\\{subdir}\\"
+                for file_type, subdir in self._share_subdirs.items()
+            }
+        return self._ip_address
+
+    def get_network_prefix(self, file_type):
+        """ファイル種別のネットワークパス接頭辞を取得（IPアドレスと同じ間隔で更新）"""
+        self.get_ip_address()
+        return self._network_prefixes[file_type]
+
+    def lookup_ip_address(self):
+        """ネットワークインターフェースからIPアドレスを取得"""
+        try:
+            # UDPソケットの送信元アドレスを調べる（パケットは送信されない）
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.connect(('1.1.1.1', 80))
+                return sock.getsockname()[0]
+        except OSError:
+            pass
+        
+        # デフォルトルートがない場合（孤立LANやPCと直結）はホスト名から引く
+        try:
+            for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+                address = info[4][0]
+                if not address.startswith('127.'):
+                    return address
+        except OSError:
+            pass
+        
+        # /etc/hostsでループバックにしか解決されない場合はインターフェースのアドレスを使う
         try:
-            # ネットワークインターフェースからIPアドレスを取得
             result = subprocess.run(['hostname', '-I'], capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                ip_addresses = result.stdout.strip().split()
-                # 最初のIPアドレスを返す（通常はローカルIP）
-                return ip_addresses[0] if ip_addresses else "unknown"
-            else:
-                return "unknown"
+            addresses = result.stdout.split()
+            if addresses:
+                return addresses[0]
         except Exception:
-            return "unknown"
+            pass
+        return "unknown"
 
     def check_camera_compatibility(self):
         """カメラツールの互換性をチェック"""
         try:
-            # raspistillのバージョンチェック
-            result = subprocess.run(['raspistill', '--help'], capture_output=True, text=True, timeout=10)
-            help_text = result.stdout + result.stderr
-            
-            # サポートされているオプションをチェック
-            self.supports_immediate = '--immediate' in help_text
-            self.supports_quality = '-q' in help_text
-            self.supports_resolution = '-w' in help_text and '-h' in help_text
+            # バイナリが更新されていなければ前回の結果を使う
+            st = os.stat(self._raspistill_path)
+            cache_key = [st.st_ino, st.st_mtime_ns]
+        except OSError:
+            cache_key = None
+        
+        caps = self.load_cached_capabilities(cache_key)
+        try:
+            if caps:
+                self.supports_immediate, self.supports_quality, self.supports_resolution = caps
+            else:
+                # raspistillのバージョンチェック
+                result = subprocess.run([self._raspistill_path, '--help'], capture_output=True, text=True, timeout=10)
+                help_text = result.stdout + result.stderr
+                
+                # サポートされているオプションをチェック
+                self.supports_immediate = '--immediate' in help_text
+                self.supports_quality = '-q' in help_text
+                self.supports_resolution = '-w' in help_text and '-h' in help_text
+                
+                self.save_cached_capabilities(cache_key)
             
-            print("📷 Camera tool compatibility check:")
+            print("📷 Camera tool compatibility check:" + (" (cached)" if caps else ""))
             print(f"   --immediate: {'✅' if self.supports_immediate else '❌'}")
             print(f"   -q (quality): {'✅' if self.supports_quality else '❌'}")
             print(f"   -w/-h (resolution): {'✅' if self.supports_resolution else '❌'}")
@@ -222,25 +466,89 @@ class CameraApp:
             self.supports_immediate = False
             self.supports_quality = True
             self.supports_resolution = True
+        
+        # プレビュー兼撮影コマンドのテンプレートを事前に構築
+        # (-s: SIGUSR1を受けるたびに1枚撮影、カメラは初期化済みのまま待機)
+        self._photo_cmd_base = [
+            self._raspistill_path,
+            '-s',  # Signal mode
+            '-t', '0',  # Unlimited
+            '-f',  # Fullscreen
+            '-n'  # No preview (headless mode)
+        ]
+        if self.supports_quality:
+            self._photo_cmd_base.extend(['-q', '90'])
+        if self.supports_resolution:
+            self._photo_cmd_base.extend(['-w', '1920', '-h', '1080'])
+
+    def load_cached_capabilities(self, cache_key):
+        """キャッシュから対応オプションを読み込む（キーが一致しなければNone）"""
+        if cache_key is None:
+            return None
+        try:
+            with open(CAPS_CACHE_FILE) as f:
+                cached = json.load(f)
+            if cached.get('key') == cache_key:
+                return (cached['immediate'], cached['quality'], cached['resolution'])
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return None
+
+    def save_cached_capabilities(self, cache_key):
+        """対応オプションをキャッシュに書き込む（失敗しても無視）"""
+        if cache_key is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(CAPS_CACHE_FILE), exist_ok=True)
+            with open(CAPS_CACHE_FILE, 'w') as f:
+                json.dump({
+                    'key': cache_key,
+                    'immediate': self.supports_immediate,
+                    'quality': self.supports_quality,
+                    'resolution': self.supports_resolution,
+                }, f)
+        except OSError:
+            pass
+
+    def find_processes(self, name):
+        """/procを走査して指定名のプロセスIDを返す（pgrepの代わり）"""
+        pids = []
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/comm') as f:
+                    if f.read().strip() == name:
+                        pids.append(int(entry))
+            except OSError:
+                # 走査中に終了したプロセス
+                continue
+        return pids
+
+    def kill_processes(self, name, sig=signal.SIGTERM):
+        """指定名のプロセスにシグナルを送信（pkillの代わり）"""
+        pids = self.find_processes(name)
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except OSError:
+                pass
+        return pids
 
     def cleanup_camera_processes(self):
-        """カメラプロセスのクリーンアップ"""
+        """前回の実行で残ったカメラプロセスのクリーンアップ（起動時のみ）"""
         try:
-            # 既存のraspistill/raspividプロセスを強制終了
-            subprocess.run(['pkill', '-f', 'raspistill'], capture_output=True)
-            subprocess.run(['pkill', '-f', 'raspivid'], capture_output=True)
-            time.sleep(1)
-            
-            # 残っているプロセスを確認
-            result = subprocess.run(['pgrep', '-f', 'raspistill'], capture_output=True, text=True)
-            if result.stdout:
-                print(f"⚠️  Remaining raspistill processes: {result.stdout.strip()}")
-                subprocess.run(['pkill', '-9', '-f', 'raspistill'], capture_output=True)
-            
-            result = subprocess.run(['pgrep', '-f', 'raspivid'], capture_output=True, text=True)
-            if result.stdout:
-                print(f"⚠️  Remaining raspivid processes: {result.stdout.strip()}")
-                subprocess.run(['pkill', '-9', '-f', 'raspivid'], capture_output=True)
+            # 既存のraspistill/raspividプロセスを終了
+            killed = self.kill_processes('raspistill') + self.kill_processes('raspivid')
+            if killed:
+                time.sleep(1)
+            
+            # 残っているプロセスを強制終了
+            for name in ('raspistill', 'raspivid'):
+                remaining = self.find_processes(name)
+                if remaining:
+                    print(f"⚠️  Remaining {name} processes: {' '.join(str(pid) for pid in remaining)}")
+                    self.kill_processes(name, signal.SIGKILL)
                 
         except Exception as e:
             print(f"⚠️  Process cleanup error: {e}")
@@ -249,40 +557,50 @@ class CameraApp:
         """ターミナル設定"""
         self.original_terminal_settings = termios.tcgetattr(sys.stdin)
         tty.setraw(sys.stdin.fileno())
-        self.monkey_patch_print()
+        self.wrap_stdout()
 
-    def monkey_patch_print(self):
-        """print関数を修正してターミナル出力を適切に処理"""
-        original_print = print
-        
-        def custom_print(*args, **kwargs):
-            # 改行を適切に処理
-            text = ' '.join(str(arg) for arg in args)
-            if not text.endswith('\n'):
-                text += '\r\n'
-            else:
-                text = text.replace('\n', '\r\n')
-            sys.stdout.write(text)
-            sys.stdout.flush()
-        
-        # グローバルなprint関数を置き換え
-        import builtins
-        builtins.print = custom_print
+    def wrap_stdout(self):
+        """rawモード用に改行をCRLFへ変換する標準出力に差し替える"""
+        # 改行変換はTextIOWrapperが行い、改行を含む書き込みごとに自動で書き出す
+        self._orig_stdout = sys.stdout
+        sys.stdout = io.TextIOWrapper(
+            open(os.dup(self._orig_stdout.fileno()), 'wb', buffering=0),
+            encoding='utf-8',
+            errors='replace',
+            newline='\r\n',
+            line_buffering=True
+        )
+
+    def flush_output(self):
+        """バッファリングされた出力を書き出す"""
+        sys.stdout.flush()
 
     def restore_terminal(self):
         """ターミナル設定を復元"""
+        self.flush_output()
+        if self._orig_stdout:
+            sys.stdout.close()
+            sys.stdout = self._orig_stdout
+            self._orig_stdout = None
         if self.original_terminal_settings:
             termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self.original_terminal_settings)
 
     def get_timestamp(self):
         """JSTタイムスタンプを取得"""
-        jst = timezone(timedelta(hours=9))
-        return datetime.now(jst).strftime("%Y%m%d_%H%M%S")
+        return datetime.now(_JST).strftime("%Y%m%d_%H%M%S")
+
+    def get_disk_usage(self):
+        """撮影データを保存するディスクの使用量を取得（5秒間キャッシュ）"""
+        now = time.monotonic()
+        if self._disk_usage is None or now - self._disk_usage_time >= DISK_USAGE_CACHE_TTL:
+            self._disk_usage = shutil.disk_usage(self.photos_dir)
+            self._disk_usage_time = now
+        return self._disk_usage
 
     def check_disk_space(self):
         """ディスク容量をチェック"""
         try:
-            usage = shutil.disk_usage(self.script_dir)
+            usage = self.get_disk_usage()
             free_gb = usage.free / (1024**3)
             return free_gb
         except Exception:
@@ -291,28 +609,42 @@ class CameraApp:
     def cleanup_old_files(self):
         """古いファイルをクリーンアップ"""
         try:
-            # Photo cleanup
-            photo_files = [f for f in os.listdir(self.photos_dir) if f.endswith('.jpg')]
-            photo_files.sort()
-            
             # Remove old files if more than 100 photos
-            if len(photo_files) > 100:
-                for old_file in photo_files[:-100]:
+            # (files already deleted over the SAMBA share are just dropped from the index)
+            while len(self._photo_files) > 100:
+                old_file = self._photo_files.popleft()
+                try:
                     os.remove(os.path.join(self.photos_dir, old_file))
-                    print(f"🗑️  Removed old photo: {old_file}")
-            
-            # 動画のクリーンアップ
-            video_files = [f for f in os.listdir(self.videos_dir) if f.endswith('.h264')]
-            video_files.sort()
+                except FileNotFoundError:
+                    continue
+                print(f"🗑️  Removed old photo: {old_file}")
             
-            # 50本を超える場合は古いものを削除
-            if len(video_files) > 50:
-                for old_file in video_files[:-50]:
+            # 50本を超える場合は古いものを削除（共有フォルダ側で削除済みのものは一覧から外すだけ）
+            while len(self._video_files) > 50:
+                old_file = self._video_files.popleft()
+                try:
                     os.remove(os.path.join(self.videos_dir, old_file))
-                    print(f"🗑️  古い動画を削除: {old_file}")
+                except FileNotFoundError:
+                    continue
+                print(f"🗑️  古い動画を削除: {old_file}")
                     
         except Exception as e:
             print(f"⚠️  ファイルクリーンアップエラー: {e}")
+        finally:
+            # 削除後は空き容量が変わるのでキャッシュを破棄
+            self._disk_usage = None
+
+    def spawn_camera_process(self, cmd):
+        """カメラプロセスを起動"""
+        # 絶対パス・close_fds=False・標準入出力がパイプでない場合、
+        # subprocessはfork+execではなくposix_spawnで起動する
+        return subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=False
+        )
 
     def start_preview(self):
         """Start camera preview"""
@@ -320,22 +652,19 @@ class CameraApp:
             if self.preview_process:
                 self.stop_preview()
             
-            self.cleanup_camera_processes()
+            # 前回の撮影で残った一時ファイルを削除
+            with os.scandir(self.photos_dir) as it:
+                for entry in it:
+                    if entry.name.startswith(CAPTURE_FILE_PREFIX):
+                        os.remove(entry.path)
             
-            # Start preview
-            cmd = [
-                'raspistill',
-                '-t', '0',  # Unlimited
-                '-f',  # Fullscreen
-                '-n',  # No preview (headless mode)
-                '-o', '/dev/null'
-            ]
+            # Start preview (raspistill in signal mode, captures on SIGUSR1)
+            capture_pattern = os.path.join(self.photos_dir, CAPTURE_FILE_PREFIX + '%04d.jpg')
+            cmd = [*self._photo_cmd_base, '-o', capture_pattern]
             
-            self.preview_process = subprocess.Popen(
-                cmd, 
-                stdout=subprocess.DEVNULL, 
-                stderr=subprocess.DEVNULL
-            )
+            self.preview_process = self.spawn_camera_process(cmd)
+            self._preview_started = time.monotonic()
+            self._preview_ready = False
             
             if not self.quiet_mode:
                 print("📷 Camera preview started")
@@ -343,19 +672,24 @@ class CameraApp:
         except Exception as e:
             print(f"❌ Preview start error: {e}")
 
+    def stop_process(self, process):
+        """自分で起動したカメラプロセスを停止（pkillを使わずPIDに直接シグナルを送る）"""
+        if process.poll() is not None:
+            return
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            os.kill(process.pid, signal.SIGKILL)
+            process.wait()
+
     def stop_preview(self):
         """Stop camera preview"""
         try:
             if self.preview_process:
-                self.preview_process.terminate()
-                self.preview_process.wait(timeout=5)
+                self.stop_process(self.preview_process)
                 self.preview_process = None
                 
-            # Check remaining processes
-            result = subprocess.run(['pgrep', '-f', 'raspistill'], capture_output=True, text=True)
-            if result.stdout:
-                subprocess.run(['pkill', '-9', '-f', 'raspistill'], capture_output=True)
-                
         except Exception as e:
             print(f"⚠️  Preview stop error: {e}")
 
@@ -367,8 +701,6 @@ class CameraApp:
                 return
             
             timestamp = self.get_timestamp()
-            filename = f"{timestamp}.jpg"
-            filepath = os.path.join(self.photos_dir, filename)
             
             # Check disk space
             free_gb = self.check_disk_space()
@@ -376,44 +708,91 @@ class CameraApp:
                 print("⚠️  Insufficient disk space")
                 self.cleanup_old_files()
             
-            # Pause preview
-            self.stop_preview()
-            time.sleep(0.5)
-            
-            # 写真撮影（互換性に基づいてパラメータを選択）
-            cmd = ['raspistill', '-o', filepath]
-            
-            # Timer setting (extended for better preview)
-            cmd.extend(['-t', '5000'])  # 5 seconds for better preview
-            
-            # Quality setting (only if supported)
-            if hasattr(self, 'supports_quality') and self.supports_quality:
-                cmd.extend(['-q', '90'])
-            
-            # Resolution setting (only if supported)
-            if hasattr(self, 'supports_resolution') and self.supports_resolution:
-                cmd.extend(['-w', '1920', '-h', '1080'])
+            # Make sure the signal-mode raspistill is running
+            if not self.preview_process or self.preview_process.poll() is not None:
+                self.start_preview()
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0 and os.path.exists(filepath):
+            # Trigger one capture without re-initializing the camera
+            capture_path = self.wait_for_capture(PHOTO_CAPTURE_TIMEOUT)
+            if capture_path:
+                filename = self.claim_photo_name(capture_path, timestamp)
+                filepath = os.path.join(self.photos_dir, filename)
+                self._photo_files.append(filename)
                 file_size = os.path.getsize(filepath) / 1024  # KB
                 print(f"📸 Photo taken successfully: {filename} ({file_size:.1f} KB)")
                 
-                # Save to SAMBA shared folder
-                self.save_to_samba(filepath, "Photo")
+                # Save to SAMBA shared folder (in background)
+                self.queue_save(filepath, "Photo")
                 
+            elif self.preview_process.poll() is not None:
+                print(f"❌ Camera process exited (exit code: {self.preview_process.returncode})")
             else:
-                print(f"❌ Photo capture error: {result.stderr}")
+                print("❌ Photo capture timed out")
                 
-        except subprocess.TimeoutExpired:
-            print("❌ Photo capture timed out")
         except Exception as e:
             print(f"❌ Photo capture error: {e}")
-        finally:
-            # Resume preview
-            time.sleep(0.5)
-            self.start_preview()
+
+    def claim_photo_name(self, capture_path, timestamp):
+        """撮影ファイルを既存の写真を上書きしない名前に確定し、ファイル名を返す"""
+        # 同じ秒に連続撮影した場合は _01, _02 ... を付ける（名前順 = 撮影順のまま）
+        # renameは既存ファイルを上書きするので、linkで作成してから一時ファイルを削除する
+        for n in range(100):
+            filename = f"{timestamp}.jpg" if n == 0 else f"{timestamp}_{n:02d}.jpg"
+            try:
+                os.link(capture_path, os.path.join(self.photos_dir, filename))
+            except FileExistsError:
+                continue
+            os.unlink(capture_path)
+            return filename
+        raise FileExistsError(f"No free file name for {timestamp}")
+
+    def wait_for_capture(self, timeout):
+        """SIGUSR1で撮影を指示し、シグナルモードのraspistillが撮影ファイルを書き終えるまで待つ"""
+        # raspistillは「ファイル名~」に書き込み、完了時にリネームする
+        # 最初の撮影指示より前からあるファイル（再送による余分な撮影や、タイムアウト後に
+        # 書き終わった撮影）は今回の撮影ではないので、書き終わり次第削除する
+        stale = set()
+        triggered = False
+        now = time.monotonic()
+        deadline = now + timeout
+        # 起動直後はシグナルを受け付けられないので準備時間が過ぎるまで送らない
+        next_trigger = max(now, self._preview_started + PREVIEW_WARMUP)
+        while True:
+            in_progress = False
+            with os.scandir(self.photos_dir) as it:
+                entries = [entry for entry in it if entry.name.startswith(CAPTURE_FILE_PREFIX)]
+            for entry in entries:
+                name = entry.name.rstrip('~')
+                if not triggered:
+                    stale.add(name)
+                if not entry.name.endswith('.jpg'):
+                    in_progress = in_progress or name not in stale
+                elif name not in stale:
+                    self._preview_ready = True
+                    return entry.path
+                else:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+            if self.preview_process.poll() is not None:
+                return None
+            now = time.monotonic()
+            if now >= deadline:
+                return None
+            if now >= next_trigger:
+                # 初回に加え、raspistillがまだ1枚も撮影していない間（初期化中でシグナルが
+                # 無視された可能性がある）は、書き込み中でなければ撮影を指示し直す
+                if not in_progress and (not triggered or not self._preview_ready):
+                    os.kill(self.preview_process.pid, signal.SIGUSR1)
+                    triggered = True
+                next_trigger = now + CAPTURE_RETRIGGER_INTERVAL
+            wait = min(deadline, next_trigger) - now
+            if self._inotify:
+                # 次のファイルイベントまで待つ（プロセス終了を確認するため最大0.5秒）
+                self._inotify.read(timeout=int(min(wait, 0.5) * 1000))
+            else:
+                time.sleep(min(wait, 0.05))
 
     def start_video_recording(self):
         """動画録画開始"""
@@ -438,7 +817,7 @@ class CameraApp:
             
             # 動画録画開始
             cmd = [
-                'raspivid',
+                self._raspivid_path,
                 '-o', filepath,
                 '-t', '0',  # 無制限
                 '-f',  # フルスクリーン
@@ -447,13 +826,11 @@ class CameraApp:
                 '-fps', '30'
             ]
             
-            self.video_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
+            self._current_video_path = filepath
+            self.video_process = self.spawn_camera_process(cmd)
             
             self.is_recording = True
+            self._video_files.append(filename)
             print(f"🎥 動画録画開始: {filename}")
             
             # プレビュー再開
@@ -472,60 +849,55 @@ class CameraApp:
                 return
             
             # 録画停止
-            self.video_process.terminate()
-            self.video_process.wait(timeout=5)
+            self.stop_process(self.video_process)
             self.video_process = None
             self.is_recording = False
             
-            # 残っているプロセスを確認
-            result = subprocess.run(['pgrep', '-f', 'raspivid'], capture_output=True, text=True)
-            if result.stdout:
-                subprocess.run(['pkill', '-9', '-f', 'raspivid'], capture_output=True)
-            
-            # 最新の動画ファイルを確認
-            video_files = [f for f in os.listdir(self.videos_dir) if f.endswith('.h264')]
-            if video_files:
-                latest_video = max(video_files, key=lambda x: os.path.getctime(os.path.join(self.videos_dir, x)))
-                filepath = os.path.join(self.videos_dir, latest_video)
+            # 録画開始時に記録したファイルを確認
+            filepath = self._current_video_path
+            self._current_video_path = None
+            if filepath and os.path.exists(filepath):
+                file_size = os.path.getsize(filepath) / (1024 * 1024)  # MB
+                print(f"🎥 動画録画完了: {os.path.basename(filepath)} ({file_size:.1f} MB)")
                 
-                if os.path.exists(filepath):
-                    file_size = os.path.getsize(filepath) / (1024 * 1024)  # MB
-                    print(f"🎥 動画録画完了: {latest_video} ({file_size:.1f} MB)")
-                    
-                    # SAMBA共有フォルダに保存
-                    self.save_to_samba(filepath, "動画")
+                # SAMBA共有フォルダに保存（バックグラウンド）
+                self.queue_save(filepath, "動画")
                     
         except Exception as e:
             print(f"❌ 動画録画停止エラー: {e}")
 
+    def check_recording_process(self):
+        """録画プロセスが予期せず終了していないか確認"""
+        if self.is_recording and self.video_process and self.video_process.poll() is not None:
+            print(f"⚠️  録画プロセスが終了しました (終了コード: {self.video_process.returncode})")
+            self.stop_video_recording()
+            self._state_changed = True
+
     def show_status(self):
         """ステータス表示"""
         try:
             # ディスク容量
-            free_gb = self.check_disk_space()
-            total_gb = shutil.disk_usage(self.script_dir).total / (1024**3)
+            usage = self.get_disk_usage()
+            free_gb = usage.free / (1024**3)
+            total_gb = usage.total / (1024**3)
             used_gb = total_gb - free_gb
             
-            print("\n" + "="*50)
-            print("📊 システムステータス")
-            print("="*50)
-            print(f"💾 ディスク容量: {used_gb:.1f}GB / {total_gb:.1f}GB (空き: {free_gb:.1f}GB)")
-            
             # 写真・動画の数
-            photo_count = len([f for f in os.listdir(self.photos_dir) if f.endswith('.jpg')])
-            video_count = len([f for f in os.listdir(self.videos_dir) if f.endswith('.h264')])
-            print(f"📸 保存済み写真: {photo_count}枚")
-            print(f"🎥 保存済み動画: {video_count}本")
+            photo_count = len(self._photo_files)
+            video_count = len(self._video_files)
             
-            # カメラ状態
-            print(f"📷 プレビュー: {'有効' if self.preview_process else '無効'}")
-            print(f"🎬 録画状態: {'録画中' if self.is_recording else '停止中'}")
-            
-            # Google Drive接続状態
-            drive_status = "接続済み" if self.drive_service else "未接続"
-            print(f"☁️  Google Drive: {drive_status}")
-            
-            print("="*50)
+            # まとめて1回で出力
+            lines = [
+                _STATUS_HEADER,
+                f"💾 ディスク容量: {used_gb:.1f}GB / {total_gb:.1f}GB (空き: {free_gb:.1f}GB)",
+                f"📸 保存済み写真: {photo_count}枚",
+                f"🎥 保存済み動画: {video_count}本",
+                f"📷 プレビュー: {'有効' if self.preview_process else '無効'}",
+                f"🎬 録画状態: {'録画中' if self.is_recording else '停止中'}",
+                f"📂 SAMBA共有: {SHARE_NAME} ({SAMBA_SHARE_PATH})",
+                "="*50,
+            ]
+            print("\n".join(lines))
             
         except Exception as e:
             print(f"❌ ステータス表示エラー: {e}")
@@ -551,15 +923,20 @@ class CameraApp:
     def show_prompt(self):
         """プロンプト表示"""
         if not self.quiet_mode:
-            print("\n🎮 キー入力待ち:")
-            print("  SPACE: 写真撮影 | v: 動画録画 | p: プレビュー切り替え")
-            print("  s: ステータス | h: シェル | q/ESC: 終了")
+            # 先にバッファ済みの出力を書き出してから1回のwriteで表示
+            sys.stdout.flush()
+            os.write(sys.stdout.fileno(), _PROMPT_BYTES)
 
     def signal_handler(self, signum, frame):
-        """シグナルハンドラー"""
-        print("\n\n🛑 終了シグナルを受信しました")
-        self.cleanup()
-        sys.exit(0)
+        """シグナルハンドラー（処理はメインループで行うので何もしない）"""
+        pass
+
+    def read_signal(self):
+        """wakeup fdに溜まったシグナル番号を読み捨て、受信したかを返す"""
+        try:
+            return bool(self._signal_rsock.recv(64))
+        except BlockingIOError:
+            return False
 
     def cleanup(self):
         """クリーンアップ処理"""
@@ -570,6 +947,9 @@ class CameraApp:
             self.stop_preview()
             self.stop_video_recording()
             
+            # 保存待ちのファイルを書き出す
+            self.stop_save_worker()
+            
             # ターミナル設定復元
             self.restore_terminal()
             
@@ -582,12 +962,47 @@ class CameraApp:
             
             # シェルに戻る
             print("\n🐚 シェルに戻ります...")
-            os.system('/bin/bash')
+            sys.stdout.flush()
+            # Pythonプロセスをbashで置き換えてメモリを解放
+            os.execvp('/bin/bash', ['bash'])
             
         except Exception as e:
             print(f"❌ クリーンアップエラー: {e}")
             sys.exit(1)
 
+    def read_key(self):
+        """標準入力から1キー読み込む（バッファを介さず、selectと整合させる）"""
+        data = os.read(sys.stdin.fileno(), 1)
+        if not data:
+            return ''
+        return data.decode('utf-8', 'replace')
+
+    def handle_key(self, key):
+        """キー入力を処理（終了する場合はFalseを返す）"""
+        if key == ' ':  # SPACE
+            self.take_photo()
+            self._state_changed = True
+        elif key.lower() == 'v':
+            if self.is_recording:
+                self.stop_video_recording()
+            else:
+                self.start_video_recording()
+            self._state_changed = True
+        elif key.lower() == 'p':
+            if self.preview_process:
+                self.stop_preview()
+                print("📷 プレビュー停止")
+            else:
+                self.start_preview()
+            self._state_changed = True
+        elif key.lower() == 's':
+            self.show_status()
+        elif key.lower() == 'h':
+            self.open_shell()
+        elif key == '' or key.lower() == 'q' or key == '\x1b':  # EOF, q or ESC
+            return False
+        return True
+
     def run(self):
         """メインループ"""
         try:
@@ -610,34 +1025,43 @@ class CameraApp:
             
             print("✅ アプリケーション準備完了!")
             
-            # メインループ
-            while True:
-                self.show_prompt()
+            # メインループ（selectorで入力を待つ）
+            selector = selectors.DefaultSelector()
+            selector.register(sys.stdin.fileno(), selectors.EVENT_READ, 'stdin')
+            selector.register(self._signal_rsock, selectors.EVENT_READ, 'signal')
+            running = True
+            prompt_pending = False
+            while running:
+                # 状態が変わった場合はすぐ、キー入力後は前回から0.5秒以上経過してからプロンプトを再描画
+                now = time.monotonic()
+                redraw_wait = self._last_prompt + PROMPT_REDRAW_INTERVAL - now
+                if self._state_changed or (prompt_pending and redraw_wait <= 0):
+                    self.show_prompt()
+                    self._last_prompt = now
+                    self._state_changed = False
+                    prompt_pending = False
                 
-                # キー入力待ち
-                key = sys.stdin.read(1)
+                # キー入力待ちの前に出力をまとめて書き出す
+                self.flush_output()
                 
-                if key == ' ':  # SPACE
-                    self.take_photo()
-                elif key.lower() == 'v':
-                    if self.is_recording:
-                        self.stop_video_recording()
-                    else:
-                        self.start_video_recording()
-                elif key.lower() == 'p':
-                    if self.preview_process:
-                        self.stop_preview()
-                        print("📷 プレビュー停止")
-                    else:
-                        self.start_preview()
-                elif key.lower() == 's':
-                    self.show_status()
-                elif key.lower() == 'h':
-                    self.open_shell()
-                elif key.lower() == 'q' or ord(key) == 27:  # q or ESC
-                    break
-                
-                time.sleep(0.1)
+                # キー入力待ち（入力がなければ1秒ごとに録画プロセスを確認、
+                # 再描画待ちがある場合はその時刻に起きる）
+                timeout = KEY_WAIT_TIMEOUT
+                if prompt_pending:
+                    timeout = min(timeout, max(redraw_wait, 0))
+                events = selector.select(timeout=timeout)
+                if not events:
+                    self.check_recording_process()
+                for selector_key, _ in events:
+                    if selector_key.data == 'signal' and self.read_signal():
+                        print("\n\n🛑 終了シグナルを受信しました")
+                        running = False
+                        break
+                    if selector_key.data == 'stdin':
+                        running = self.handle_key(self.read_key())
+                        prompt_pending = True
+            
+            selector.close()
                 
         except KeyboardInterrupt:
             print("\n\n🛑 Ctrl+Cで終了しました")
@@ -650,6 +1074,8 @@ def main():
     """メイン関数"""
     try:
         app = CameraApp()
+        # --quiet: 補足メッセージとプロンプトを表示しない
+        app.quiet_mode = '--quiet' in sys.argv[1:]
         app.run()
     except Exception as e:
         print(f"❌ アプリケーション起動エラー: {e}")
@@ -5,25 +5,62 @@ Helps resolve ENOSPC (no space left on device) errors
 """
 
 import os
-import glob
-import shutil
+import sys
+import heapq
+import getpass
+from concurrent.futures import ThreadPoolExecutor
+
+# camera_app.py writes captures straight into the SAMBA share (same paths as there)
+SAMBA_SHARE_PATH = f'/home/{getpass.getuser()}/public'
+PHOTOS_DIR = os.path.join(SAMBA_SHARE_PATH, 'photos')
+VIDEOS_DIR = os.path.join(SAMBA_SHARE_PATH, 'videos')
+
+# Number of unlinks kept in flight at once (SD card work overlaps across threads)
+UNLINK_WORKERS = 4
+
+def _scan(dirpath, suffix):
+    """List (path, stat) pairs for files with the given suffix in one directory pass"""
+    with os.scandir(dirpath) as it:
+        return [(e.path, e.stat()) for e in it if e.is_file() and e.name.endswith(suffix)]
+
+def _try_unlink(path):
+    """Remove one file, returning the exception instead of raising"""
+    try:
+        os.unlink(path)
+        return None
+    except Exception as e:
+        return e
+
+def _remove_files(paths):
+    """Remove files in parallel; returns one error (or None) per path, in order"""
+    with ThreadPoolExecutor(max_workers=UNLINK_WORKERS) as executor:
+        return list(executor.map(_try_unlink, paths))
+
+def _write_lines(lines):
+    """Write a batch of report lines with a single write"""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
 def check_disk_space():
     """Check available disk space"""
     try:
-        total, used, free = shutil.disk_usage(os.getcwd())
+        st = os.statvfs(PHOTOS_DIR)
+        total = st.f_blocks * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        free = st.f_bavail * st.f_frsize
         
         # Convert to MB
-        free_mb = free // (1024 * 1024)
-        total_mb = total // (1024 * 1024)
-        used_percent = (used / total) * 100
+        free_mb = free >> 20
+        total_mb = total >> 20
+        used_tenths = (used * 1000 + total // 2) // total if total else 0  # 0.1% units, rounded, integer only
         
         print(f"💾 Current disk usage:")
         print(f"   Total: {total_mb}MB")
-        print(f"   Used: {used_percent:.1f}%")
+        print(f"   Used: {used_tenths // 10}.{used_tenths % 10}%")
         print(f"   Free: {free_mb}MB")
         
-        return free_mb, total_mb, used_percent
+        return free_mb, total_mb, used_tenths / 10
         
     except Exception as e:
         print(f"❌ Error checking disk space: {e}")
@@ -32,11 +69,11 @@ def check_disk_space():
 def count_files():
     """Count current photos and videos"""
     try:
-        photos = glob.glob("photos/*.jpg")
-        videos = glob.glob("videos/*.h264")
+        photos = _scan(PHOTOS_DIR, ".jpg")
+        videos = _scan(VIDEOS_DIR, ".h264")
         
-        photo_size = sum(os.path.getsize(f) for f in photos) // (1024 * 1024)  # MB
-        video_size = sum(os.path.getsize(f) for f in videos) // (1024 * 1024)  # MB
+        photo_size = sum(st.st_size for _, st in photos) // (1024 * 1024)  # MB
+        video_size = sum(st.st_size for _, st in videos) // (1024 * 1024)  # MB
         
         print(f"\n📊 Current files:")
         print(f"   📸 Photos: {len(photos)} files ({photo_size}MB)")
@@ -66,42 +103,42 @@ def cleanup_old_files(max_photos=50, max_videos=10, confirm=True):
     
     try:
         # Clean up old photos
-        photos = glob.glob("photos/*.jpg")
+        photos = _scan(PHOTOS_DIR, ".jpg")
         if len(photos) > max_photos:
-            # Sort by modification time (oldest first)
-            photos.sort(key=os.path.getmtime)
-            to_remove = photos[:-max_photos]  # Keep only the newest max_photos
+            # Pick the oldest ones by modification time (oldest first), keeping the newest max_photos
+            to_remove = heapq.nsmallest(len(photos) - max_photos, photos, key=lambda entry: entry[1].st_mtime)
             
             removed_size = 0
-            for photo in to_remove:
-                try:
-                    size = os.path.getsize(photo)
-                    os.remove(photo)
-                    removed_size += size
-                    print(f"   🗑️ Removed: {os.path.basename(photo)}")
-                except Exception as e:
-                    print(f"   ❌ Failed to remove {photo}: {e}")
+            report = []
+            errors = _remove_files([photo for photo, _ in to_remove])
+            for (photo, st), e in zip(to_remove, errors):
+                if e is None:
+                    removed_size += st.st_size
+                    report.append(f"   🗑️ Removed: {os.path.basename(photo)}")
+                else:
+                    report.append(f"   ❌ Failed to remove {photo}: {e}")
+            _write_lines(report)
                     
             print(f"   📸 Removed {len(to_remove)} old photos ({removed_size//1024//1024}MB)")
         else:
             print(f"   📸 Only {len(photos)} photos, no cleanup needed")
         
         # Clean up old videos
-        videos = glob.glob("videos/*.h264")
+        videos = _scan(VIDEOS_DIR, ".h264")
         if len(videos) > max_videos:
-            # Sort by modification time (oldest first)
-            videos.sort(key=os.path.getmtime)
-            to_remove = videos[:-max_videos]  # Keep only the newest max_videos
+            # Pick the oldest ones by modification time (oldest first), keeping the newest max_videos
+            to_remove = heapq.nsmallest(len(videos) - max_videos, videos, key=lambda entry: entry[1].st_mtime)
             
             removed_size = 0
-            for video in to_remove:
-                try:
-                    size = os.path.getsize(video)
-                    os.remove(video)
-                    removed_size += size
-                    print(f"   🗑️ Removed: {os.path.basename(video)} ({size//1024//1024}MB)")
-                except Exception as e:
-                    print(f"   ❌ Failed to remove {video}: {e}")
+            report = []
+            errors = _remove_files([video for video, _ in to_remove])
+            for (video, st), e in zip(to_remove, errors):
+                if e is None:
+                    removed_size += st.st_size
+                    report.append(f"   🗑️ Removed: {os.path.basename(video)} ({st.st_size//1024//1024}MB)")
+                else:
+                    report.append(f"   ❌ Failed to remove {video}: {e}")
+            _write_lines(report)
                     
             print(f"   🎥 Removed {len(to_remove)} old videos ({removed_size//1024//1024}MB)")
         else:
@@ -120,10 +157,10 @@ def main():
     print("Helps resolve ENOSPC (No space left on device) errors")
     print()
     
-    # Check if we're in the right directory
-    if not os.path.exists("photos") or not os.path.exists("videos"):
-        print("❌ Error: photos/ and videos/ directories not found")
-        print("   Run this script from your camera_app_raspi2 directory")
+    # Check that the shared folders exist
+    if not os.path.isdir(PHOTOS_DIR) or not os.path.isdir(VIDEOS_DIR):
+        print(f"❌ Error: {PHOTOS_DIR} and {VIDEOS_DIR} not found")
+        print("   Run camera_app.py once to create the SAMBA shared folders")
         return
     
     # Show current status